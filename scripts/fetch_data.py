@@ -5,11 +5,16 @@ Alchemy RPC를 통해 Aave V3 포지션 데이터 수집
 Health Factor <= 2 & 담보 >= $100K 필터링
 """
 
+import asyncio
 import json
 import os
-from datetime import datetime
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
 
 # ===== Configuration =====
 ALCHEMY_API_KEY = os.environ.get('ALCHEMY_API_KEY', '')
@@ -33,93 +38,225 @@ AAVE_POOL_ADDRESSES = {
 # Thresholds
 MAX_HEALTH_FACTOR = 2
 MIN_COLLATERAL_USD = 100000  # $100K
+MAX_OUTPUT_POSITIONS = 100  # Top 100 most risky per chain
+
+# Known large Aave users (public addresses), always checked
+KNOWN_WHALES = frozenset({
+    "0x5a52e96bacdabb82fd05763e25335261b270efcb",
+    "0xc4a6e45e2f3b8f5f3b0b2b0f8e0f7b5d5f5b8d8f",
+    "0x8eb8a3b98659cce290402893d0123abb75e3ab28",
+    "0x3ddfa8ec3052539b6c9549f12cea2c295cff5296",
+    "0x28c6c06298d514db089934071355e5743bf21d60",
+    "0xf977814e90da44bfa03b6295a0616a897441acec",
+    "0x0548f59fee79f8832c299e01dca5c76f034f558e",
+    "0xe8c060f8052e07423f71d445277c61ac5138a2e5",
+    "0x189b9cbd4aff470af2c0102f365fc1823d857965",
+    "0x8103c101b954b73f6e4d8d8a8d6e2fef4fce3e3f",
+})
+
+# alchemy_getAssetTransfers page size (API max is 1000)
+TRANSFER_PAGE_SIZE = 100
+
+# Function selector for getUserAccountData(address)
+GET_USER_ACCOUNT_DATA_SELECTOR = bytes.fromhex("bf92857c")
+
+# getUserAccountData word scales (multiply instead of divide per word)
+BASE_CURRENCY_UNIT = 1e-8  # USD base currency, 8 decimals
+BPS_UNIT = 1e-4            # liquidation threshold / ltv in basis points
+WAD_UNIT = 1e-18           # health factor, 18 decimals
+
+# Max eth_call requests per JSON-RPC batch - each call counts against the key's
+# compute-unit rate limit, so batches stay small and few are in flight per chain
+RPC_BATCH_SIZE = 25
+# Max in-flight RPC requests per chain (all four chains share one Alchemy key)
+RPC_CONCURRENCY = 2
+# Retries for failed batch entries, with exponential backoff starting at RPC_RETRY_BACKOFF seconds
+RPC_MAX_RETRIES = 3
+RPC_RETRY_BACKOFF = 1.0
 
 OUTPUT_DIR = "../data"
 
+# Pretty-print output JSON for local debugging; compact otherwise
+DEBUG = os.environ.get('DEBUG', '').lower() in ('1', 'true', 'yes')
 
-def rpc_call(url: str, method: str, params: list) -> dict:
-    """Execute JSON-RPC call"""
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": method,
-        "params": params
-    }
-    
-    data = json.dumps(payload).encode('utf-8')
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    
-    req = Request(url, data=data, headers=headers, method='POST')
-    
-    try:
-        with urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get('result')
-    except Exception as e:
-        print(f"RPC Error: {e}")
-        return None
+# Opt-in getUserAccountData cache per (chain, address, 10-minute window), for local
+# repeat runs only (RPC_CACHE=1). Cached health factors can be up to 10 minutes old.
+RPC_CACHE = os.environ.get('RPC_CACHE', '').lower() in ('1', 'true', 'yes')
+RPC_CACHE_FILE = ".rpc_cache.db"
+RPC_CACHE_BUCKET_SECONDS = 600
 
+COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd"
 
-def get_logs(rpc_url: str, contract_address: str, topics: list, from_block: str, to_block: str = "latest") -> list:
-    """Get event logs from contract"""
-    params = [{
-        "address": contract_address,
-        "topics": topics,
-        "fromBlock": from_block,
-        "toBlock": to_block
-    }]
-    
-    result = rpc_call(rpc_url, "eth_getLogs", params)
-    return result if result else []
+# HTTP 429 handling: retries per request, backoff start and cap (seconds)
+HTTP_MAX_RETRIES = 4
+HTTP_RETRY_BACKOFF = 1.0
+HTTP_MAX_RETRY_DELAY = 30
+
+JSON_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
 
+# Keep-alive connections, one per (worker thread, host)
+_connections = threading.local()
 
-def get_recent_block(rpc_url: str, blocks_ago: int = 10000) -> str:
-    """Get a recent block number - reduced range for Alchemy limits"""
-    current = rpc_call(rpc_url, "eth_blockNumber", [])
-    if current:
-        block_num = int(current, 16) - blocks_ago
-        return hex(max(block_num, 0))
-    return "0x0"
 
+def _get_connection(scheme: str, host: str, timeout: float):
+    """Return this thread's pooled connection to host, opening it if needed"""
+    pool = getattr(_connections, 'pool', None)
+    if pool is None:
+        pool = _connections.pool = {}
+    
+    conn = pool.get((scheme, host))
+    if conn is None:
+        conn_class = HTTPSConnection if scheme == 'https' else HTTPConnection
+        conn = pool[(scheme, host)] = conn_class(host, timeout=timeout)
+    return conn
+
+
+def _drop_connection(scheme: str, host: str):
+    """Close and forget this thread's connection to host"""
+    conn = getattr(_connections, 'pool', {}).pop((scheme, host), None)
+    if conn is not None:
+        conn.close()
 
-def decode_address_from_topic(topic: str) -> str:
-    """Extract address from 32-byte topic"""
-    if topic and len(topic) >= 66:
-        return "0x" + topic[26:66]
-    return None
 
+def _retry_delay(response, attempt: int) -> float:
+    """Seconds to wait before retrying a 429: Retry-After if given, else exponential backoff"""
+    retry_after = response.getheader('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), HTTP_MAX_RETRY_DELAY)
+    return min(HTTP_RETRY_BACKOFF * 2 ** attempt, HTTP_MAX_RETRY_DELAY)
 
-def get_user_account_data(rpc_url: str, pool_address: str, user_address: str) -> dict:
+
+def http_request(url: str, payload=None, timeout: float = 30):
     """
-    Call getUserAccountData on Aave Pool
-    Returns: totalCollateralBase, totalDebtBase, availableBorrowsBase, 
-             currentLiquidationThreshold, ltv, healthFactor
+    Send a JSON request over a pooled keep-alive connection
+    POST when payload is given, GET otherwise. Returns the decoded JSON body.
     """
-    # Function selector for getUserAccountData(address)
-    func_selector = "0xbf92857c"
-    # Pad address to 32 bytes
-    padded_address = user_address[2:].lower().zfill(64)
-    call_data = func_selector + padded_address
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    
+    body = json.dumps(payload).encode('utf-8') if payload is not None else None
+    method = 'POST' if body is not None else 'GET'
+    
+    reconnected = False
+    rate_limited = 0
+    while True:
+        conn = _get_connection(parts.scheme, parts.netloc, timeout)
+        try:
+            conn.request(method, path, body=body, headers=JSON_HEADERS)
+            response = conn.getresponse()
+            data = response.read()
+        except (HTTPException, ConnectionError):
+            # Server closed an idle keep-alive connection - reconnect once
+            _drop_connection(parts.scheme, parts.netloc)
+            if reconnected:
+                raise
+            reconnected = True
+            continue
+        except Exception:
+            _drop_connection(parts.scheme, parts.netloc)
+            raise
+        
+        if response.status == 429 and rate_limited < HTTP_MAX_RETRIES:
+            # Rate limited - wait as instructed (or back off exponentially) and retry
+            time.sleep(_retry_delay(response, rate_limited))
+            rate_limited += 1
+            continue
+        
+        if response.status >= 400:
+            raise HTTPError(url, response.status, response.reason, response.headers, None)
+        return json.loads(data.decode('utf-8'))
+
+
+def rpc_call_batch(url: str, calls: list) -> list:
+    """Execute a batch of JSON-RPC calls in a single request
+    calls: list of (method, params) tuples
+    Returns results in the same order as calls. Failed entries are retried with
+    exponential backoff; raises RuntimeError if any are still failing after that.
+    """
+    results = [None] * len(calls)
+    pending = list(range(len(calls)))
+    error = None
+    
+    for attempt in range(RPC_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(RPC_RETRY_BACKOFF * 2 ** (attempt - 1))
+        
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": calls[i][0], "params": calls[i][1]}
+            for i in pending
+        ]
+        
+        try:
+            responses = http_request(url, payload)
+        except Exception as e:
+            error = e
+            print(f"RPC Batch Error (attempt {attempt + 1}): {e}")
+            continue
+        
+        if not isinstance(responses, list):
+            # Provider rejected the whole batch with a single error object
+            error = responses.get('error')
+            print(f"RPC Batch Error (attempt {attempt + 1}): {error}")
+            continue
+        
+        # Responses may arrive in any order - match them back by id
+        failed = set(pending)
+        for r in responses:
+            idx = r.get('id')
+            if idx in failed and 'result' in r:
+                results[idx] = r['result']
+                failed.discard(idx)
+            elif r.get('error'):
+                error = r['error']
+        
+        pending = [i for i in pending if i in failed]
+        if not pending:
+            return results
+    
+    raise RuntimeError(f"{len(pending)}/{len(calls)} RPC calls failed after {RPC_MAX_RETRIES} retries: {error}")
+
+
+def is_valid_address(address: str) -> bool:
+    """Check for a 0x-prefixed, 20-byte hex address (account_data_call needs valid hex)"""
+    if len(address) != 42 or not address.startswith('0x'):
+        return False
+    try:
+        bytes.fromhex(address[2:])
+    except ValueError:
+        return False
+    return True
+
+
+def account_data_call(pool_address: str, user_address: str) -> tuple:
+    """Build the eth_call (method, params) for getUserAccountData(user)"""
+    # Selector + address left-padded to 32 bytes, hex-encoded once
+    padded_address = bytes.fromhex(user_address[2:]).rjust(32, b"\x00")
+    call_data = "0x" + (GET_USER_ACCOUNT_DATA_SELECTOR + padded_address).hex()
     
     params = [
         {"to": pool_address, "data": call_data},
         "latest"
     ]
-    
-    result = rpc_call(rpc_url, "eth_call", params)
-    
+    return "eth_call", params
+
+
+def decode_account_data(result: str) -> dict:
+    """Decode the six uint256 values returned by getUserAccountData"""
     if result and len(result) >= 386:  # 0x + 6 * 64 chars
         try:
-            # Each value is 32 bytes (64 hex chars)
-            total_collateral = int(result[2:66], 16) / 1e8  # in USD (8 decimals)
-            total_debt = int(result[66:130], 16) / 1e8
-            available_borrows = int(result[130:194], 16) / 1e8
-            liquidation_threshold = int(result[194:258], 16) / 10000
-            ltv = int(result[258:322], 16) / 10000
-            health_factor = int(result[322:386], 16) / 1e18
+            # Hex-decode once, then read each 32-byte word as a big-endian uint256
+            raw = bytes.fromhex(result[2:386])
+            total_collateral = int.from_bytes(raw[0:32], 'big') * BASE_CURRENCY_UNIT  # in USD
+            total_debt = int.from_bytes(raw[32:64], 'big') * BASE_CURRENCY_UNIT
+            available_borrows = int.from_bytes(raw[64:96], 'big') * BASE_CURRENCY_UNIT
+            liquidation_threshold = int.from_bytes(raw[96:128], 'big') * BPS_UNIT
+            ltv = int.from_bytes(raw[128:160], 'big') * BPS_UNIT
+            health_factor = int.from_bytes(raw[160:192], 'big') * WAD_UNIT
             
             return {
                 "totalCollateralUSD": total_collateral,
@@ -135,90 +272,209 @@ def get_user_account_data(rpc_url: str, pool_address: str, user_address: str) ->
     return None
 
 
+def has_debt(result: str) -> bool:
+    """Check the totalDebtBase word without decoding the rest of the result"""
+    return bool(result) and result[66:130].strip('0') != ''
+
+
+def decode_account_batch(results: list) -> list:
+    """
+    Decode a batch of getUserAccountData results
+    Debt-free accounts become {"totalDebtUSD": 0.0} (cacheable, never qualify);
+    failed or malformed results become None
+    """
+    decoded = []
+    for result in results:
+        if not result or len(result) < 386:
+            decoded.append(None)
+        elif has_debt(result):
+            decoded.append(decode_account_data(result))
+        else:
+            # Skip decoding the other five words - the account can never qualify
+            decoded.append({"totalDebtUSD": 0.0})
+    return decoded
+
+
+def get_user_account_data_batch(rpc_url: str, pool_address: str, user_addresses: list) -> list:
+    """Call getUserAccountData for many users in one JSON-RPC batch"""
+    calls = [account_data_call(pool_address, user) for user in user_addresses]
+    results = rpc_call_batch(rpc_url, calls)
+    return decode_account_batch(results)
+
+
 def fetch_borrowers_from_transfers(rpc_url: str, pool_address: str, limit: int = 200) -> set:
-    """Fetch borrowers using Alchemy Transfers API + known whales"""
-    
-    # Start with known large Aave users (public addresses)
-    known_whales = {
-        "0x5a52e96bacdabb82fd05763e25335261b270efcb",
-        "0xc4a6e45e2f3b8f5f3b0b2b0f8e0f7b5d5f5b8d8f",
-        "0x8eb8a3b98659cce290402893d0123abb75e3ab28",
-        "0x3ddfa8ec3052539b6c9549f12cea2c295cff5296",
-        "0x28c6c06298d514db089934071355e5743bf21d60",
-        "0xf977814e90da44bfa03b6295a0616a897441acec",
-        "0x0548f59fee79f8832c299e01dca5c76f034f558e",
-        "0xe8c060f8052e07423f71d445277c61ac5138a2e5",
-        "0x189b9cbd4aff470af2c0102f365fc1823d857965",
-        "0x8103c101b954b73f6e4d8d8a8d6e2fef4fce3e3f",
-    }
-    
-    borrowers = set(known_whales)
-    print(f"    Starting with {len(known_whales)} known whale addresses")
-    
-    # Try Alchemy Transfers API
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "alchemy_getAssetTransfers",
-        "params": [{
-            "fromBlock": "0x0",
-            "toBlock": "latest",
-            "toAddress": pool_address,
-            "category": ["external"],
-            "maxCount": "0x64",
-            "order": "desc"
-        }]
-    }
+    """Fetch borrowers using Alchemy Transfers API + known whales
+    Scans up to `limit` of the most recent transfers, TRANSFER_PAGE_SIZE per page
+    """
     
-    data = json.dumps(payload).encode('utf-8')
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
+    borrowers = set(KNOWN_WHALES)
+    print(f"    Starting with {len(KNOWN_WHALES)} known whale addresses")
+    
+    # Try Alchemy Transfers API - pages are cursor-linked (pageKey), so they are fetched in order
+    params = {
+        "fromBlock": "0x0",
+        "toBlock": "latest",
+        "toAddress": pool_address,
+        "category": ["external"],
+        "maxCount": hex(TRANSFER_PAGE_SIZE),
+        "order": "desc"
     }
     
-    req = Request(rpc_url, data=data, headers=headers, method='POST')
-    
+    scanned = 0
     try:
         print(f"    Fetching recent transfers to Aave Pool...")
-        with urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            transfers = result.get('result', {}).get('transfers', [])
+        while scanned < limit:
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "alchemy_getAssetTransfers",
+                "params": [params]
+            }
+            result = http_request(rpc_url, payload).get('result') or {}
+            transfers = result.get('transfers', [])
+            scanned += len(transfers)
             
             for t in transfers:
-                from_addr = t.get('from', '').lower()
-                if from_addr and from_addr.startswith('0x'):
+                from_addr = (t.get('from') or '').lower()
+                if is_valid_address(from_addr):
                     borrowers.add(from_addr)
             
-            print(f"    Found {len(transfers)} transfers, {len(borrowers)} total addresses")
+            page_key = result.get('pageKey')
+            if not page_key or len(transfers) < TRANSFER_PAGE_SIZE:
+                break
+            params = {**params, "pageKey": page_key}
     except Exception as e:
         print(f"    Transfer API: {e}")
     
+    print(f"    Found {scanned} transfers, {len(borrowers)} total addresses")
     print(f"    Total addresses to check: {len(borrowers)}")
     return borrowers
 
 
+def init_rpc_cache() -> str:
+    """Create the local getUserAccountData cache; returns its path, or None if unavailable"""
+    path = os.path.join(OUTPUT_DIR, RPC_CACHE_FILE)
+    try:
+        with sqlite3.connect(path) as cache:
+            cache.execute(
+                "CREATE TABLE IF NOT EXISTS account_cache ("
+                "chain TEXT, addr TEXT, bucket INTEGER, payload TEXT, ts REAL, "
+                "PRIMARY KEY (chain, addr, bucket))"
+            )
+        return path
+    except sqlite3.Error as e:
+        print(f"RPC cache unavailable: {e}")
+        return None
+
+
+def load_cached_account_data(cache_path: str, chain: str, bucket: int, users: set) -> dict:
+    """Cached account data for users in this time bucket, keyed by address"""
+    cache = sqlite3.connect(cache_path)
+    try:
+        rows = cache.execute(
+            "SELECT addr, payload FROM account_cache WHERE chain = ? AND bucket = ?",
+            (chain, bucket)
+        ).fetchall()
+    finally:
+        cache.close()
+    return {addr: json.loads(payload) for addr, payload in rows if addr in users}
+
+
+def save_cached_account_data(cache_path: str, chain: str, bucket: int, account_data: dict):
+    """Store fresh account data and drop entries from older buckets"""
+    now = time.time()
+    cache = sqlite3.connect(cache_path)
+    try:
+        with cache:
+            cache.execute("DELETE FROM account_cache WHERE chain = ? AND bucket < ?", (chain, bucket))
+            cache.executemany(
+                "INSERT OR REPLACE INTO account_cache VALUES (?, ?, ?, ?, ?)",
+                [(chain, addr, bucket, json.dumps(data), now) for addr, data in account_data.items()]
+            )
+    finally:
+        cache.close()
+
+
 def fetch_eth_price() -> float:
     """Fetch current ETH price from CoinGecko"""
-    url = "https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd"
     try:
-        req = Request(url, headers={"Accept": "application/json"})
-        with urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            return data.get('ethereum', {}).get('usd', 2500)
+        data = http_request(COINGECKO_URL, timeout=10)
+        return data.get('ethereum', {}).get('usd', 2500)
     except:
         return 2500
 
 
-def process_chain(chain: str, rpc_url: str, pool_address: str) -> dict:
+def format_positions(addr_arr: list, hf_arr: list, col_arr: list, debt_arr: list, lt_arr: list, order: list) -> list:
+    """Materialize output dicts for the selected rows only"""
+    return [
+        {
+            "address": addr_arr[i],
+            "healthFactor": round(hf_arr[i], 4),
+            "collateralValue": round(col_arr[i], 2),
+            "borrowValue": round(debt_arr[i], 2),
+            "liquidationThreshold": round(lt_arr[i], 4),
+            "collateralAsset": "Mixed",
+            "borrowAsset": "Mixed",
+            "collateralAmount": 1  # Placeholder for calculation
+        }
+        for i in order
+    ]
+
+
+def compute_positions(accounts: dict) -> dict:
+    """
+    Filter and rank decoded account data ({address: account_data}) - pure, no I/O
+    Returns: positions (top MAX_OUTPUT_POSITIONS by lowest HF), totalPositions,
+             totalCollateralUsd, totalBorrowUsd
+    """
+    # Account data as parallel columns - dicts are only built for the output slice.
+    # Debt-free entries carry only totalDebtUSD, so the other columns get neutral defaults.
+    addr_arr, hf_arr, col_arr, debt_arr, lt_arr = [], [], [], [], []
+    for user, account_data in accounts.items():
+        addr_arr.append(user)
+        hf_arr.append(account_data.get('healthFactor', float('inf')))
+        col_arr.append(account_data.get('totalCollateralUSD', 0.0))
+        debt_arr.append(account_data['totalDebtUSD'])
+        lt_arr.append(account_data.get('liquidationThreshold', 0.0))
+    
+    # Filter mask in one pass, then sort only the surviving rows
+    idx = [
+        i for i, (hf, collateral, debt) in enumerate(zip(hf_arr, col_arr, debt_arr))
+        if debt > 0 and hf <= MAX_HEALTH_FACTOR and collateral >= MIN_COLLATERAL_USD
+    ]
+    
+    # Lowest health factor first = most risky
+    order = sorted(idx, key=hf_arr.__getitem__)[:MAX_OUTPUT_POSITIONS]
+    
+    # Both chain totals in a single pass over the surviving rows
+    total_collateral = 0
+    total_borrow = 0
+    for i in idx:
+        total_collateral += round(col_arr[i], 2)
+        total_borrow += round(debt_arr[i], 2)
+    
+    return {
+        "positions": format_positions(addr_arr, hf_arr, col_arr, debt_arr, lt_arr, order),
+        "totalPositions": len(idx),
+        "totalCollateralUsd": total_collateral,
+        "totalBorrowUsd": total_borrow
+    }
+
+
+async def get_user_account_data_async(sem: asyncio.Semaphore, rpc_url: str, pool_address: str, user_addresses: list) -> list:
+    """Batch getUserAccountData call, bounded by the chain's semaphore"""
+    async with sem:
+        return await asyncio.to_thread(get_user_account_data_batch, rpc_url, pool_address, user_addresses)
+
+
+async def process_chain(chain: str, rpc_url: str, pool_address: str, run_ts: str, cache_path: str = None) -> dict:
     """Process positions for a single chain"""
     print(f"\n{'='*50}")
     print(f"Processing {chain.upper()}...")
     print(f"Pool: {pool_address}")
     
-    positions = []
-    
     # Get borrowers from transfers/transactions
-    borrowers = fetch_borrowers_from_transfers(rpc_url, pool_address)
+    borrowers = await asyncio.to_thread(fetch_borrowers_from_transfers, rpc_url, pool_address)
     
     if not borrowers:
         print(f"    No borrowers found")
@@ -226,65 +482,115 @@ def process_chain(chain: str, rpc_url: str, pool_address: str) -> dict:
             "positions": [],
             "meta": {
                 "chain": chain,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": run_ts,
                 "error": "No borrowers found"
             }
         }
     
     print(f"    Checking {len(borrowers)} addresses for qualifying positions...")
     
-    checked = 0
-    for user in borrowers:
-        account_data = get_user_account_data(rpc_url, pool_address, user)
-        
-        if account_data:
-            hf = account_data['healthFactor']
-            collateral = account_data['totalCollateralUSD']
-            debt = account_data['totalDebtUSD']
-            liq_threshold = account_data['liquidationThreshold']
-            
-            # Apply filters
-            if hf <= MAX_HEALTH_FACTOR and collateral >= MIN_COLLATERAL_USD and debt > 0:
-                positions.append({
-                    "address": user,
-                    "healthFactor": round(hf, 4),
-                    "collateralValue": round(collateral, 2),
-                    "borrowValue": round(debt, 2),
-                    "liquidationThreshold": round(liq_threshold, 4),
-                    "collateralAsset": "Mixed",
-                    "borrowAsset": "Mixed",
-                    "collateralAmount": 1  # Placeholder for calculation
-                })
-        
-        checked += 1
-        if checked % 100 == 0:
-            print(f"    Checked {checked}/{len(borrowers)}, found {len(positions)} qualifying")
-    
-    # Sort by health factor (lowest first = most risky)
-    positions.sort(key=lambda x: x['healthFactor'])
-    
-    print(f"✅ {chain}: {len(positions)} positions (HF <= {MAX_HEALTH_FACTOR}, >= ${MIN_COLLATERAL_USD:,})")
+    # Reuse results fetched within the same time bucket
+    bucket = int(time.time() // RPC_CACHE_BUCKET_SECONDS)
+    accounts = {}
+    if cache_path:
+        try:
+            accounts = await asyncio.to_thread(load_cached_account_data, cache_path, chain, bucket, borrowers)
+        except sqlite3.Error as e:
+            # The cache is optional - carry on with live calls
+            print(f"    RPC cache read failed: {e}")
+    cached_count = len(accounts)
+    if cached_count:
+        print(f"    {cached_count} addresses served from RPC cache")
+    
+    uncached = [user for user in borrowers if user not in accounts]
+    batches = [
+        uncached[start:start + RPC_BATCH_SIZE]
+        for start in range(0, len(uncached), RPC_BATCH_SIZE)
+    ]
     
-    return {
-        "positions": positions[:100],  # Top 100 most risky
+    sem = asyncio.Semaphore(RPC_CONCURRENCY)
+    results = await asyncio.gather(*[
+        get_user_account_data_async(sem, rpc_url, pool_address, batch)
+        for batch in batches
+    ])
+    
+    fetched = {
+        user: account_data
+        for batch, batch_data in zip(batches, results)
+        for user, account_data in zip(batch, batch_data)
+        if account_data
+    }
+    if cache_path and fetched:
+        try:
+            await asyncio.to_thread(save_cached_account_data, cache_path, chain, bucket, fetched)
+        except sqlite3.Error as e:
+            print(f"    RPC cache write failed: {e}")
+    accounts.update(fetched)
+    
+    computed = compute_positions(accounts)
+    total_positions = computed['totalPositions']
+    print(f"    Checked {len(borrowers)} addresses, found {total_positions} qualifying")
+    print(f"✅ {chain}: {total_positions} positions (HF <= {MAX_HEALTH_FACTOR}, >= ${MIN_COLLATERAL_USD:,})")
+    
+    output = {
+        "positions": computed['positions'],
         "meta": {
             "chain": chain,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": run_ts,
             "filters": {
                 "maxHealthFactor": MAX_HEALTH_FACTOR,
                 "minCollateralUsd": MIN_COLLATERAL_USD
             },
-            "totalPositions": len(positions),
-            "totalCollateralUsd": sum(p['collateralValue'] for p in positions),
-            "totalBorrowUsd": sum(p['borrowValue'] for p in positions)
+            "totalPositions": total_positions,
+            "totalCollateralUsd": computed['totalCollateralUsd'],
+            "totalBorrowUsd": computed['totalBorrowUsd']
         }
     }
+    if cache_path:
+        # Flag output built partly from cached (possibly stale) account data
+        output['meta']['cachedAccounts'] = cached_count
+    return output
 
 
-def main():
+def save_json(path: str, data: dict):
+    """Write chain data to disk"""
+    if DEBUG:
+        text = json.dumps(data, indent=2)
+    else:
+        text = json.dumps(data, separators=(',', ':'))
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+async def fetch_chain_data(chain: str, run_ts: str, cache_path: str = None) -> dict:
+    """Process a single chain and save its output file"""
+    rpc_url = RPC_URLS[chain]
+    pool_address = AAVE_POOL_ADDRESSES[chain]
+    
+    try:
+        data = await process_chain(chain, rpc_url, pool_address, run_ts, cache_path)
+    except Exception as e:
+        print(f"❌ Error processing {chain}: {e}")
+        data = {
+            "positions": [],
+            "meta": {"chain": chain, "timestamp": run_ts, "error": str(e)}
+        }
+    
+    # Save to file
+    output_path = os.path.join(OUTPUT_DIR, f"{chain}.json")
+    await asyncio.to_thread(save_json, output_path, data)
+    print(f"💾 Saved to {output_path}")
+    
+    return data
+
+
+async def main_async():
     print("🐋 Aave Whale Watch - Data Fetcher (Alchemy)")
     print("="*50)
-    print(f"Timestamp: {datetime.utcnow().isoformat()}")
+    # One timestamp shared by every chain's output
+    run_ts = datetime.now(timezone.utc).isoformat()
+    print(f"Timestamp: {run_ts}")
     
     # Check API Key
     if not ALCHEMY_API_KEY:
@@ -298,10 +604,14 @@ def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Fetch ETH price
-    eth_price = fetch_eth_price()
+    eth_price = await asyncio.to_thread(fetch_eth_price)
     print(f"\n💰 ETH Price: ${eth_price:,.2f}")
     
-    # Process each chain
+    # Process all chains concurrently
+    cache_path = await asyncio.to_thread(init_rpc_cache) if RPC_CACHE else None
+    chains = list(RPC_URLS.keys())
+    results = await asyncio.gather(*[fetch_chain_data(chain, run_ts, cache_path) for chain in chains])
+    
     summary = {
         'total_positions': 0,
         'total_collateral': 0,
@@ -309,25 +619,7 @@ def main():
         'chains': {}
     }
     
-    for chain in RPC_URLS.keys():
-        rpc_url = RPC_URLS[chain]
-        pool_address = AAVE_POOL_ADDRESSES[chain]
-        
-        try:
-            data = process_chain(chain, rpc_url, pool_address)
-        except Exception as e:
-            print(f"❌ Error processing {chain}: {e}")
-            data = {
-                "positions": [],
-                "meta": {"chain": chain, "error": str(e)}
-            }
-        
-        # Save to file
-        output_path = os.path.join(OUTPUT_DIR, f"{chain}.json")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"💾 Saved to {output_path}")
-        
+    for chain, data in zip(chains, results):
         # Update summary
         summary['total_positions'] += len(data.get('positions', []))
         summary['total_collateral'] += data.get('meta', {}).get('totalCollateralUsd', 0)
@@ -355,5 +647,9 @@ def main():
     print("\n✅ Data fetch complete!")
 
 
+def main():
+    asyncio.run(main_async())
+
+
 if __name__ == "__main__":
     main()